@@ -1,8 +1,14 @@
 import csv
+import math
+import numpy as np
 import pandas as pd
 from geopy.geocoders import Nominatim
 from geopy.distance import geodesic
 import logging
+import shelve
+import threading
+import time
+from functools import lru_cache
 
 import geocoder 
 from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
@@ -14,6 +20,8 @@ from data import (
 # Set up logging
 logger = logging.getLogger(__name__)
 
+EARTH_RADIUS_KM = 6371.0
+
 def is_valid_coordinate(value):
     try:
         num = float(value)
@@ -64,6 +72,7 @@ def get_unique_towns(all_fitness_centers):
 
 def get_fitness_centers_by_town(town_name):
     # Filter all fitness centers by town
+    all_fitness = get_all_fitness_centers_cached()
     city_studios = all_fitness[all_fitness["addr:city"].str.lower() == town_name.lower()]
     return len(city_studios)
 
@@ -78,11 +87,15 @@ def get_name_studio(all_fitness_centers, city_name):
     studio_names = city_studios["name"].dropna().unique().tolist()
     return studio_names
 
-all_fitness = get_all_fitness_centers()
+@lru_cache(maxsize=1)
+def get_all_fitness_centers_cached():
+    # Read the CSV files on first use instead of at import time
+    return get_all_fitness_centers()
 
 def get_fitness_centers_by_name(studio_chain, city_name):
     
     if studio_chain:
+        all_fitness = get_all_fitness_centers_cached()
         city_studios = all_fitness[all_fitness["addr:city"].str.lower() == city_name.lower()]
         fitness_center = city_studios[city_studios["name"].str.contains(studio_chain.lower(), na=False)]
         return fitness_center
@@ -90,7 +103,7 @@ def get_fitness_centers_by_name(studio_chain, city_name):
         return []
 
 # NEW: Get fitness centers by coordinates with distance filtering
-def get_fitness_centers_by_coordinates(coords, country_code, max_distance_km=50):
+def get_fitness_centers_by_coordinates(coords, country_code, max_distance_km=50, search_index=None):
     """
     Get fitness centers within a certain distance from given coordinates.
     
@@ -98,6 +111,7 @@ def get_fitness_centers_by_coordinates(coords, country_code, max_distance_km=50)
         coords (tuple): (latitude, longitude) of the search point
         country_code (str): Country code to filter results ('DE' or 'FR')
         max_distance_km (float): Maximum distance in kilometers
+        search_index (dict): Result of build_search_index; built from the CSV files if None
     
     Returns:
         pandas.DataFrame: Filtered fitness centers with distance column
@@ -107,42 +121,159 @@ def get_fitness_centers_by_coordinates(coords, country_code, max_distance_km=50)
     
     lat, lon = coords
     
-    # Get all fitness centers for the country
-    all_centers = get_all_fitness_centers()
-    if all_centers.empty:
+    # Get all fitness centers
+    if search_index is None:
+        search_index = build_search_index(get_all_fitness_centers())
+    latitudes = search_index["latitude"]
+    longitudes = search_index["longitude"]
+    if len(latitudes) == 0:
         return pd.DataFrame()
     
-    # Filter by country
-    country_centers = all_centers[all_centers["addr:country"] == country_code]
+    # Bounding box around the search point (111 km per degree slightly overestimates it, so nothing is lost)
+    delta_lat = max_distance_km / 111.0
+    delta_lon = max_distance_km / (111.0 * max(math.cos(math.radians(lat)), 1e-6))
     
-    if country_centers.empty:
-        return pd.DataFrame()
+    # Latitude band by binary search on the sorted coordinates
+    start = np.searchsorted(latitudes, lat - delta_lat, side="left")
+    stop = np.searchsorted(latitudes, lat + delta_lat, side="right")
+    
+    # Filter the band by country and longitude
+    in_box = (
+        (search_index["country"][start:stop] == country_code)
+        & (np.abs(longitudes[start:stop] - lon) <= delta_lon)
+    )
+    candidates = np.flatnonzero(in_box) + start
+    
+    # Calculate the exact distances of the remaining candidates in one vectorized pass
+    distances = haversine_km(lat, lon, latitudes[candidates], longitudes[candidates])
+    within = distances <= max_distance_km
     
-    # Calculate distances
-    distances = []
-    valid_centers = []
-    
-    for _, center in country_centers.iterrows():
-        if (pd.notna(center["latitude"]) and pd.notna(center["longitude"]) and 
-            center["latitude"] != 0 and center["longitude"] != 0):
-            
-            center_coords = (center["latitude"], center["longitude"])
-            distance = compute_distance(coords, center_coords)
-            
-            if distance is not None and distance <= max_distance_km:
-                distances.append(distance)
-                valid_centers.append(center)
-    
-    if not valid_centers:
+    if not within.any():
         return pd.DataFrame()
     
-    # Create DataFrame with distance information
-    result_df = pd.DataFrame(valid_centers)
-    result_df["distance_km"] = distances
+    # Create DataFrame with distance information (only the matching rows are materialized)
+    result_df = search_index["centers"].iloc[candidates[within]].copy()
+    result_df["distance_km"] = distances[within]
     result_df = result_df.sort_values("distance_km")
     
     return result_df
 
+def build_search_index(fitness_centers):
+    """
+    Prepare fitness centers for repeated radius searches.
+    
+    Keeps the rows with valid coordinates, sorts them by latitude and stores
+    the columns the search scans as contiguous arrays next to the DataFrame,
+    so get_fitness_centers_by_coordinates can binary-search the latitude band
+    and only touch the DataFrame for the matching rows.
+    
+    Args:
+        fitness_centers (pandas.DataFrame): All fitness centers
+    
+    Returns:
+        dict: "centers" (sorted DataFrame), "latitude"/"longitude" (float32 arrays)
+        and "country" (array of country codes), all in the same row order
+    """
+    latitudes = pd.to_numeric(fitness_centers["latitude"], errors="coerce")
+    longitudes = pd.to_numeric(fitness_centers["longitude"], errors="coerce")
+    valid = latitudes.notna() & longitudes.notna() & (latitudes != 0) & (longitudes != 0)
+    
+    centers = (
+        fitness_centers[valid]
+        .assign(latitude=latitudes[valid], longitude=longitudes[valid])
+        .sort_values("latitude", kind="stable")
+    )
+    return {
+        "centers": centers,
+        "latitude": centers["latitude"].to_numpy(dtype=np.float32),
+        "longitude": centers["longitude"].to_numpy(dtype=np.float32),
+        "country": centers["addr:country"].to_numpy(dtype=object),
+    }
+
+GEOCODE_CACHE_PATH = ".geocache"  # shelve file, survives server restarts
+GEOCODE_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# Lives in this imported module, so all sessions share it; the Streamlit script
+# itself is re-executed on every rerun and would create a new lock each time
+_geocode_cache_lock = threading.Lock()
+
+def read_geocode_cache(key):
+    """
+    Return an entry of the on-disk geocoding cache if present and not expired.
+    
+    Args:
+        key (str): Cache key
+    
+    Returns:
+        Cached value or None
+    """
+    try:
+        with _geocode_cache_lock, shelve.open(GEOCODE_CACHE_PATH, flag="r") as cache:
+            entry = cache.get(key)
+    except Exception as e:
+        # Also raised before the first write, when the cache file does not exist yet
+        logger.info(f"Geocoding cache not readable: {e}")
+        return None
+    
+    if entry and time.time() - entry[0] < GEOCODE_CACHE_TTL_SECONDS:
+        return entry[1]
+    return None
+
+def write_geocode_cache(key, value):
+    """
+    Store a value with the current timestamp in the on-disk geocoding cache.
+    
+    Args:
+        key (str): Cache key
+        value: Picklable value to store
+    """
+    try:
+        with _geocode_cache_lock, shelve.open(GEOCODE_CACHE_PATH) as cache:
+            cache[key] = (time.time(), value)
+    except Exception as e:
+        logger.warning(f"Geocoding cache not writable: {e}")
+
+@lru_cache(maxsize=1)
+def get_geolocator():
+    """Shared Nominatim client, so its HTTP session is reused across searches."""
+    return Nominatim(
+        user_agent="GreenFitnessApp/1.0",
+        timeout=15
+    )
+
+@lru_cache(maxsize=256)
+def geocode_cached(location, country_code=None):
+    """
+    Geocode an address or city with Nominatim, restricted to country_code if given.
+    
+    Results are memoized per process (this module is imported once, unlike the
+    Streamlit script, which is re-executed on every rerun) and kept on disk for
+    GEOCODE_CACHE_TTL_SECONDS, so repeated searches skip Nominatim even after a
+    server restart. Request errors are raised and therefore not cached.
+    
+    Args:
+        location (str): Address or city name
+        country_code (str): Country code to restrict the search to, or None
+    
+    Returns:
+        tuple: ((latitude, longitude), city name or None), or (None, None) if nothing was found
+    """
+    cache_key = f"location|{country_code or ''}|{location.strip().lower()}"
+    cached_result = read_geocode_cache(cache_key)
+    if cached_result:
+        return cached_result
+    
+    location_data = get_geolocator().geocode(location, country_codes=country_code, addressdetails=True)
+    if not location_data:
+        return None, None
+    
+    result = (
+        (location_data.latitude, location_data.longitude),
+        get_city_from_geocode(location_data.raw),
+    )
+    write_geocode_cache(cache_key, result)
+    return result
+
 # NEW: Extract city from address string
 def extract_city_from_address(address_string):
     """
@@ -159,33 +290,46 @@ def extract_city_from_address(address_string):
         location = geolocator.geocode(address_string)
         
         if location and hasattr(location, 'raw'):
-            # Try to get city from different possible fields
-            raw_data = location.raw
-            city_fields = ['city', 'town', 'village', 'municipality']
-            
-            for field in city_fields:
-                if field in raw_data.get('display_name', ''):
-                    # Parse display name to extract city
-                    parts = raw_data['display_name'].split(', ')
-                    for part in parts:
-                        if any(keyword in part.lower() for keyword in ['stadt', 'city', 'town']):
-                            return part.strip()
-                    # If no specific city indicator, return the second part (often the city)
-                    if len(parts) > 1:
-                        return parts[1].strip()
-            
-            # Fallback: try to extract from address components
-            if 'address' in raw_data:
-                addr = raw_data['address']
-                for field in city_fields:
-                    if field in addr:
-                        return addr[field]
+            return get_city_from_geocode(location.raw)
         
         return None
     except Exception as e:
         logger.error(f"Error extracting city from address: {e}")
         return None
 
+def get_city_from_geocode(raw_data):
+    """
+    Extract the city name from a raw Nominatim geocoding result.
+    
+    Args:
+        raw_data (dict): ``raw`` attribute of a geopy Location
+    
+    Returns:
+        str: Extracted city name or None
+    """
+    # Try to get city from different possible fields
+    city_fields = ['city', 'town', 'village', 'municipality']
+    
+    for field in city_fields:
+        if field in raw_data.get('display_name', ''):
+            # Parse display name to extract city
+            parts = raw_data['display_name'].split(', ')
+            for part in parts:
+                if any(keyword in part.lower() for keyword in ['stadt', 'city', 'town']):
+                    return part.strip()
+            # If no specific city indicator, return the second part (often the city)
+            if len(parts) > 1:
+                return parts[1].strip()
+    
+    # Fallback: try to extract from address components
+    if 'address' in raw_data:
+        addr = raw_data['address']
+        for field in city_fields:
+            if field in addr:
+                return addr[field]
+    
+    return None
+
 # NEW: Get studio names from DataFrame
 def get_studio_names_from_centers(fitness_centers_df):
     """
@@ -268,6 +412,26 @@ def compute_distance(user_coords, fitness_coords):
     
     return geodesic(user_coords, fitness_coords).km
 
+def haversine_km(lat, lon, latitudes, longitudes):
+    """
+    Compute the great-circle distance from one point to many points at once.
+
+    Args:
+        lat (float): Latitude of the reference point
+        lon (float): Longitude of the reference point
+        latitudes (array-like): Latitudes of the other points
+        longitudes (array-like): Longitudes of the other points
+
+    Returns:
+        numpy.ndarray: Distances in kilometers
+    """
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2 = np.radians(np.asarray(latitudes, dtype=float))
+    lon2 = np.radians(np.asarray(longitudes, dtype=float))
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
 def get_address_from_coordinates(latitude, longitude):
     """
     Get the address from latitude and longitude using reverse geocoding.
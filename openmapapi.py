@@ -7,6 +7,7 @@ from typing import Any
 from pathlib import Path
 from shapely.geometry import shape
 from shapely.geometry import Point
+from shapely.geometry import mapping
 from unidecode import unidecode
 
 load_dotenv()
@@ -17,8 +18,8 @@ api_url = "https://api.openchargemap.io/v3/poi/"
 if api_key is None:
     raise ValueError("⚠️ API key is missing! Please check your .env file.")
 
-# API Open Charge Map
-@st.cache_data(show_spinner=False)
+# API Open Charge Map (cached for an hour per coordinates/radius)
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_charging_stations(latitude, longitude, max_results=30, radius_km=1):
 
     if api_key is None:
@@ -89,8 +90,42 @@ def get_town_boundary(town_name: str, country_code: str, level=2) -> Any | None:
     return None
 
 
+def round_coordinates(coordinates, precision=5):
+    """Round nested GeoJSON coordinate lists to a fixed number of decimals (5 ≈ 1 m)."""
+    if isinstance(coordinates, (int, float)):
+        return round(coordinates, precision)
+    return [round_coordinates(c, precision) for c in coordinates]
+
+
+def simplify_boundary(geojson_data, tolerance=0.01, precision=5):
+    """
+    Simplify the geometries of a GeoJSON FeatureCollection for display on the map.
+
+    Args:
+        geojson_data: GeoJSON FeatureCollection
+        tolerance: Simplification tolerance in degrees (0.01 ≈ 1 km)
+        precision: Decimals kept per coordinate
+
+    Returns:
+        New FeatureCollection with simplified, rounded geometries
+    """
+    features = []
+    for feature in geojson_data["features"]:
+        geometry = mapping(shape(feature["geometry"]).simplify(tolerance, preserve_topology=True))
+        features.append({
+            **feature,
+            "geometry": {
+                "type": geometry["type"],
+                "coordinates": round_coordinates(geometry["coordinates"], precision),
+            },
+        })
+    return {**geojson_data, "features": features}
+
+
+# Static boundary files (read and simplified once per country)
+@st.cache_data(show_spinner=False)
 def get_country_boundary(country_code, level=0):
-    """Load the local GeoJSON file for a country and level."""
+    """Load the local GeoJSON file for a country and level, simplified for display."""
     base_path = "data/boundaries"
     file_map = {
         "DE": "DE_level0.json",
@@ -104,4 +139,4 @@ def get_country_boundary(country_code, level=0):
     filepath = f"{base_path}/{filename}"
     with open(filepath, "r", encoding="utf-8") as f:
         geojson_data = json.load(f)
-    return geojson_data
+    return simplify_boundary(geojson_data)
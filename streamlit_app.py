@@ -1,21 +1,17 @@
 import streamlit as st
 import json
 import logging
+import re
 import folium
-from geopy.distance import geodesic
-from folium.plugins import HeatMap
+from folium.plugins import FastMarkerCluster
 import pandas as pd
+import numpy as np
 from dotenv import load_dotenv
-from streamlit_folium import st_folium
-from geopy.geocoders import Nominatim
+import streamlit.components.v1 as components
 from typing import Dict, Any, List, Tuple, Optional, Callable
-import logging
-from functools import lru_cache
-import time
 
 from fitness_center_data import *
 from openmapapi import * # get_charging_stations, get_town_boundary
-from openroute import *
 from result_view import get_card_view_fitness, get_show_details_fitness, get_card_view_fitness_enhanced
 from data import LOGO
 
@@ -32,23 +28,81 @@ DEFAULT_COORDINATES = {
 }
 DEFAULT_ZOOM = 5
 DEFAULT_SEARCH_RADIUS_KM = 1
-
-all_fitness_centers = get_all_fitness_centers()
+MAX_SEARCH_RADIUS_KM = 5
+# Result cap of the single MAX_SEARCH_RADIUS_KM station request. It is filtered down to
+# the slider radius in memory, so it must cover dense city centres: a cap of 50 (what a
+# direct 1 km request used) could cut off stations close to the studio.
+MAX_CHARGING_STATIONS = 500
 
 # Icon configuration
 ICONS = {
-    "fitness": {"color": "green", "icon": "dumbbell"},
-    "selected_fitness": {"color": "red", "icon": "star"},
-    "charging_station": {"color": "blue", "icon": "plug"}
+    "selected_fitness": {"color": "red", "icon": "star", "prefix": "fa"},
+    "search": {"color": "purple", "icon": "search", "prefix": "fa"},
+}
+
+# Circle marker styles for the many-point layers (drawn on the canvas renderer)
+CIRCLE_MARKERS = {
+    "fitness": {"radius": 6, "color": "#2ca02c", "fill": True, "fill_opacity": 0.9},
+    "charging_station": {"radius": 6, "color": "#1f77b4", "fill": True, "fill_opacity": 0.9},
+}
+
+# <script>...</script> blocks of the rendered map (captured, so re.split keeps them)
+SCRIPT_BLOCK_PATTERN = re.compile(r"(<script\b.*?</script>)", re.IGNORECASE | re.DOTALL)
+
+# Boundary layer styles
+BOUNDARY_STYLES = {
+    "country": {"fillColor": "#A0C8F0", "color": "#0050A0", "weight": 2, "fillOpacity": 0.2},
+    "town": {"fillColor": "orange", "color": "orange", "weight": 2, "fillOpacity": 0.1},
 }
+BOUNDARY_SMOOTH_FACTOR = 2.0  # Leaflet's simplification tolerance in pixels (default 1.0)
+
+# Client-side marker factory for the clustered fitness layer; rows are [lat, lon, tooltip]
+FITNESS_MARKER_CALLBACK = """
+function (row) {
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]), %s);
+    marker.bindTooltip(row[2]);
+    return marker;
+}
+""" % json.dumps({
+    "radius": CIRCLE_MARKERS["fitness"]["radius"],
+    "color": CIRCLE_MARKERS["fitness"]["color"],
+    "fill": CIRCLE_MARKERS["fitness"]["fill"],
+    "fillOpacity": CIRCLE_MARKERS["fitness"]["fill_opacity"],
+})
+
+
+def make_icon(kind: str) -> folium.Icon:
+    """
+    Create the folium Icon configured for ``kind`` in ICONS.
+
+    folium 0.19 attaches an Icon to the last marker it was added to, so a
+    single instance cannot be shared between markers. Every marker gets its
+    own Icon, built from the preconfigured kwargs.
+    """
+    return folium.Icon(**ICONS[kind])
+
+@st.cache_data(show_spinner=False)
+def load_all_fitness_centers() -> pd.DataFrame:
+    """Load the fitness center CSV files once per process instead of on every rerun."""
+    return get_all_fitness_centers()
+
+
+@st.cache_resource(show_spinner=False)
+def load_fitness_search_index() -> Dict[str, Any]:
+    """Search index of the fitness centers (see build_search_index); shared read-only across sessions."""
+    return build_search_index(load_all_fitness_centers())
+
 
 # Initialize session state
 def init_session_state() -> None:
     """Initialize all required session state variables."""
+    if "fitness_centers" not in st.session_state:
+        st.session_state.fitness_centers = load_all_fitness_centers()
+
     state_defaults = {
         "selected_country_code": DEFAULT_COUNTRY_CODE,
-        "fitness_centers": all_fitness_centers,
         "charging_stations": [],
+        "charging_stations_all": [],  # Stations within MAX_SEARCH_RADIUS_KM of the selected studio
         "selected_fitness": None,
         "map_center": DEFAULT_COORDINATES[DEFAULT_COUNTRY_CODE],
         "zoom_start": DEFAULT_ZOOM,
@@ -58,10 +112,13 @@ def init_session_state() -> None:
         "search_history": [],
         "last_search_params": {},
         "location": None,
+        "records_by_name": {},  # Search results as records, grouped by studio name
         "studio_filters": {},  # New state to track which studios are checked/unchecked
         "town_boundary": None,  # For town boundary visualization
         "search_results_info": None,  # For search results statistics
         "search_radius_km": DEFAULT_SEARCH_RADIUS_KM,  # Initialize radius
+        "last_charging_key": None,  # (lat, lon) of the studio whose stations are loaded
+        "recenter_count": 0,  # Bumped by the re-center button to force a fresh map render
     }
     
     for key, default_value in state_defaults.items():
@@ -71,19 +128,21 @@ def init_session_state() -> None:
 
 
 # Geocoding functions
-@lru_cache(maxsize=32)
-def geocode_location(location: str) -> Optional[Tuple[float, float]]:
-    """Geocode with better timeout handling."""
+def geocode_location(
+    location: str, country_code: Optional[str] = None
+) -> Tuple[Optional[Tuple[float, float]], Optional[str]]:
+    """
+    Geocode with better timeout handling, restricted to ``country_code`` if given.
+
+    The lookup itself is cached in geocode_cached (fitness_center_data), in
+    memory per process and on disk; this wrapper only adds the city fallback
+    for failed requests.
+
+    Returns:
+        ((latitude, longitude), city name) - either part may be None
+    """
     try:
-        geolocator = Nominatim(
-            user_agent="GreenFitnessApp/1.0", 
-            timeout=15  # Increased from 1 to 15 seconds
-        )
-        location_data = geolocator.geocode(location)
-        
-        if location_data:
-            return location_data.latitude, location_data.longitude
-        return None
+        return geocode_cached(location, country_code)
     
     except Exception as e:
         logger.error(f"Geocoding error: {str(e)}")
@@ -100,9 +159,9 @@ def geocode_location(location: str) -> Optional[Tuple[float, float]]:
         location_lower = location.lower().strip()
         if location_lower in fallback_coords:
             logger.info(f"Using fallback coordinates for {location}")
-            return fallback_coords[location_lower]
+            return fallback_coords[location_lower], location.strip()
         
-        return None
+        return None, None
 
 
 # Map handling functions
@@ -117,109 +176,392 @@ def create_base_map(center: Tuple[float, float], zoom: int) -> folium.Map:
     Returns:
         Folium Map object
     """
-    m = folium.Map(location=center, zoom_start=zoom)
+    # Vector layers (circle markers, boundaries) share one canvas instead of one SVG/DOM node each
+    m = folium.Map(location=center, zoom_start=zoom, prefer_canvas=True)
     return m
 
 
-def add_fitness_markers(m: folium.Map, fitness_centers: List[Dict[str, Any]]) -> None:
+def add_fitness_markers(m: folium.Map, fitness_centers: pd.DataFrame) -> int:
     """
-    Add markers for fitness centers to the map.
+    Add markers for fitness centers to the map as one clustered layer.
+
+    The points are shipped as a single JS array to FastMarkerCluster, which
+    draws each one as a circle marker on the client instead of emitting a
+    Leaflet object per studio in the HTML.
     
     Args:
         m: Folium map object
-        fitness_centers: List of fitness center data dictionaries
+        fitness_centers: DataFrame of fitness centers to show
+
+    Returns:
+        Number of markers added
     """
-    for fitness in fitness_centers:
-        if "latitude" in fitness and "longitude" in fitness:
-            try:
-                folium.Marker(
-                    location=[fitness["latitude"], fitness["longitude"]],
-                    popup=fitness.get("name", "Fitness Center"),
-                    icon=folium.Icon(**ICONS["fitness"]),
-                ).add_to(m)
-            except Exception as e:
-                logger.error(f"Error adding fitness marker: {str(e)}")
+    # Drop rows without usable coordinates, then format all tooltips at once
+    visible = fitness_centers.assign(
+        latitude=pd.to_numeric(fitness_centers["latitude"], errors="coerce"),
+        longitude=pd.to_numeric(fitness_centers["longitude"], errors="coerce"),
+    )
+    visible = visible[
+        visible["latitude"].notna() & visible["longitude"].notna()
+        & (visible["latitude"] != 0) & (visible["longitude"] != 0)
+    ]
+    if visible.empty:
+        return 0
+
+    visible = visible.assign(tooltip=build_fitness_tooltips(visible))
+    FastMarkerCluster(
+        visible[["latitude", "longitude", "tooltip"]].values.tolist(),
+        callback=FITNESS_MARKER_CALLBACK,
+        options={"disableClusteringAtZoom": 14},
+        name="Fitnessstudios",
+    ).add_to(m)
+    return len(visible)
+
+
+def build_fitness_tooltips(fitness_centers: pd.DataFrame) -> pd.Series:
+    """
+    Build the map tooltip of every fitness center with vectorized string operations.
+
+    Args:
+        fitness_centers: DataFrame of fitness centers
+
+    Returns:
+        Series of tooltip HTML strings aligned with the DataFrame index
+    """
+    tooltips = "🏋️‍♂️ " + fitness_centers["name"].fillna("Fitness Center").astype(str)
+    if "distance_km" in fitness_centers.columns:
+        distance = fitness_centers["distance_km"]
+        tooltips = tooltips + np.where(
+            distance.notna(), " (" + distance.round(1).astype(str) + "km)", ""
+        )
+    return (
+        tooltips
+        + "<br>📍 " + fitness_centers["addr:street"].fillna("").astype(str)
+        + " " + fitness_centers["addr:housenumber"].fillna("").astype(str)
+    )
+
+
+def build_full_addresses(fitness_centers: pd.DataFrame) -> pd.Series:
+    """
+    Join street, house number, postcode and city of every fitness center into one string.
+
+    Args:
+        fitness_centers: DataFrame of fitness centers
+
+    Returns:
+        Series of addresses aligned with the DataFrame index (empty string if unknown)
+    """
+    postcode = fitness_centers["addr:postcode"]
+    if pd.api.types.is_float_dtype(postcode):
+        # Postcodes are parsed as floats from the CSV files: 54292.0 -> "54292"
+        postcode = postcode.round().astype("Int64")
+
+    parts = [
+        fitness_centers["addr:street"],
+        fitness_centers["addr:housenumber"],
+        postcode,
+        fitness_centers["addr:city"],
+    ]
+    address = parts[0].astype("string").fillna("")
+    for part in parts[1:]:
+        address = address + " " + part.astype("string").fillna("")
+    return address.str.replace(r"\s+", " ", regex=True).str.strip().astype(object)
 
 
 def add_charging_station_markers(m: folium.Map, stations: List[Dict[str, Any]]) -> None:
     """
-    Add markers for charging stations to the map with improved validation.
+    Add markers for charging stations to the map as one GeoJSON layer.
+
+    Tooltip and popup HTML are built for all stations at once with pandas
+    string operations and shipped as feature properties of a single
+    FeatureCollection; the stations must already be validated
+    (see validate_charging_stations). They stay unclustered: they lie within
+    the slider radius around one studio and each of them should stay visible.
     """
     try:
         if not stations:
             logger.warning("No charging stations provided to add to map.")
             return
 
-        added_stations = 0
         logger.info(f"Attempting to add {len(stations)} charging stations to map")
 
-        for i, station in enumerate(stations):
+        df = pd.DataFrame(stations).reindex(
+            columns=["name", "address", "city", "latitude", "longitude", "distance"]
+        )
+        names = df["name"].fillna("Charging Station").astype(str)
+        addresses = df["address"].fillna("Adresse unbekannt").astype(str)
+        cities = df["city"].fillna("Unbekannt").astype(str)
+        distances = pd.to_numeric(df["distance"], errors="coerce")
+        known_distance = distances.notna()
+        distance_text = distances.round(1).astype(str) + "km"
+
+        tooltips = (
+            "🔌 " + names + "<br>📍 " + addresses + "<br>"
+            + np.where(known_distance, "🚗 " + distance_text + " entfernt", "🚗 Entfernung unbekannt")
+        )
+        popups = (
+            '<div style="width: 200px;"><h4>🔌 ' + names + "</h4>"
+            + "<p><strong>📍 Adresse:</strong><br>" + addresses + "</p>"
+            + "<p><strong>🏙️ Stadt:</strong> " + cities + "</p>"
+            + "<p><strong>🚗 Entfernung:</strong> "
+            + np.where(known_distance, distance_text, "unbekannt") + "</p></div>"
+        )
+
+        features = [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [lon, lat]},
+                "properties": {"tooltip": tooltip, "popup": popup},
+            }
+            for lat, lon, tooltip, popup in zip(
+                df["latitude"].tolist(), df["longitude"].tolist(), tooltips.tolist(), popups.tolist()
+            )
+        ]
+        folium.GeoJson(
+            {"type": "FeatureCollection", "features": features},
+            name="Ladestationen",
+            marker=folium.CircleMarker(**CIRCLE_MARKERS["charging_station"]),
+            tooltip=folium.GeoJsonTooltip(fields=["tooltip"], labels=False),
+            popup=folium.GeoJsonPopup(fields=["popup"], labels=False),
+        ).add_to(m)
+
+        logger.info(f"Successfully added {len(df)} charging station markers to map")
+
+    except Exception as e:
+        logger.error(f"Error in adding charging station markers: {str(e)}")
+
+
+# Map rendering
+@st.cache_data(max_entries=32, show_spinner=False)
+def build_map_html(
+    country_code: str,
+    map_center: Tuple[float, float],
+    zoom_level: int,
+    location: Optional[str],
+    search_radius_km: int,
+    layers_key: Tuple,
+    _fitness_centers: pd.DataFrame,
+    _studios_name: List[str],
+    _studio_filters: Dict[str, bool],
+    _selected_fitness: Optional[Dict[str, Any]],
+    _charging_stations: List[Dict[str, Any]],
+    _town_boundary: Optional[Dict[str, Any]],
+) -> str:
+    """
+    Build the folium map and return its rendered HTML.
+
+    The underscore arguments are not hashed by Streamlit; ``layers_key`` must
+    summarize them so that a cache hit only happens for an identical map.
+
+    Returns:
+        Standalone HTML document of the map
+    """
+    m = create_base_map(center=map_center, zoom=zoom_level)
+
+    # Add country boundary visualization
+    country_name_map = {"DE": "Germany", "FR": "France"}
+    country_name = country_name_map[country_code]
+    try:
+        country_boundary = get_country_boundary(country_code)
+
+        if country_boundary:
+            # Add country boundary
+            boundary_layer = folium.GeoJson(
+                country_boundary,
+                name="Country Boundary",
+                style_function=lambda feature: BOUNDARY_STYLES["country"],
+                smooth_factor=BOUNDARY_SMOOTH_FACTOR,
+            ).add_to(m)
+
+            # Fit to bounds if available and no specific search location
             try:
-                # Validate station data
-                if not station.get("latitude") or not station.get("longitude"):
-                    logger.warning(f"Station {i+1} missing coordinates: {station}")
-                    continue
-                
-                # Check for "Unknown" values
-                if station.get("latitude") == "Unknown" or station.get("longitude") == "Unknown":
-                    logger.warning(f"Station {i+1} has 'Unknown' coordinates")
-                    continue
-                
-                # Convert to float and validate
-                lat = float(station["latitude"])
-                lon = float(station["longitude"])
-                
-                if lat == 0 or lon == 0:
-                    logger.warning(f"Station {i+1} has invalid coordinates: {lat}, {lon}")
-                    continue
-                
-                # Create marker
-                station_name = station.get('name', 'Charging Station')
-                station_address = station.get('address', 'Adresse unbekannt')
-                distance = station.get('distance', 'N/A')
-                
-                tooltip_text = (
-                    f"🔌 {station_name}<br>"
-                    f"📍 {station_address}<br>"
-                    f"🚗 {distance}km entfernt" if distance != 'N/A' else f"🚗 Entfernung unbekannt"
-                )
-                
-                folium.Marker(
-                    location=[lat, lon],
-                    tooltip=tooltip_text,
-                    popup=f"""
-                    <div style="width: 200px;">
-                        <h4>🔌 {station_name}</h4>
-                        <p><strong>📍 Adresse:</strong><br>{station_address}</p>
-                        <p><strong>🏙️ Stadt:</strong> {station.get('city', 'Unbekannt')}</p>
-                        <p><strong>🚗 Entfernung:</strong> {distance}km</p>
-                    </div>
-                    """,
-                    icon=folium.Icon(color="blue", icon="plug"),
-                ).add_to(m)
-                
-                added_stations += 1
-                
-            except (ValueError, TypeError) as e:
-                logger.error(f"Invalid coordinates for station {i+1} {station.get('name', 'Unknown')}: {e}")
-                continue
+                if not _selected_fitness and not location:
+                    m.fit_bounds(boundary_layer.get_bounds())
             except Exception as e:
-                logger.error(f"Error adding station {i+1}: {e}")
-                continue
+                logger.warning(f"Could not fit to bounds: {e}")
+        else:
+            st.warning(f"⚠️ Grenze für {country_name} konnte nicht geladen werden.")
+    except Exception as e:
+        logger.warning(f"Error loading country boundary: {e}")
+    
+    # Add town boundary if available
+    if _town_boundary:
+        folium.GeoJson(
+            _town_boundary,
+            name="Selected Town",
+            style_function=lambda feature: BOUNDARY_STYLES["town"],
+            smooth_factor=BOUNDARY_SMOOTH_FACTOR,
+        ).add_to(m)
+    
+    # Add search location marker
+    if location and map_center:
+        folium.Marker(
+            location=map_center,
+            tooltip=f"🔍 Suchstandort: {location}",
+            icon=make_icon("search"),
+        ).add_to(m)
+    
+    # Add filtered fitness markers to the map
+    if _studios_name and not _fitness_centers.empty:
+        # Only add markers for checked studios
+        checked_studios = [studio for studio in _studios_name if _studio_filters.get(studio, True)]
+        visible_centers = _fitness_centers[_fitness_centers["name"].isin(checked_studios)]
 
-        logger.info(f"Successfully added {added_stations} charging station markers to map")
+        fitness_count = add_fitness_markers(m, visible_centers) if not visible_centers.empty else 0
+        logger.info(f"Added {fitness_count} fitness center markers to map")
+    
+    # Add selected fitness and charging stations if applicable
+    if _selected_fitness:
+        selected = _selected_fitness
         
-        if added_stations == 0:
-            logger.warning("No charging stations were successfully added to the map")
+        if "latitude" in selected and "longitude" in selected:
+            try:
+                sel_lat = float(selected["latitude"])
+                sel_lon = float(selected["longitude"])
+                
+                if sel_lat != 0 and sel_lon != 0:
+                    # Add special marker for selected fitness
+                    distance_text = ""
+                    if "distance_km" in selected and pd.notna(selected["distance_km"]):
+                        distance_text = f" ({selected['distance_km']:.1f}km)"
+                    
+                    folium.Marker(
+                        location=[sel_lat, sel_lon],
+                        tooltip=(f"⭐🏋️‍♂️ {selected.get('name', 'Selected Fitness')}{distance_text}"
+                                f"<br>📍 {selected.get('addr:street', '')} {selected.get('addr:housenumber', '')}"
+                                ),
+                        icon=make_icon("selected_fitness"),
+                    ).add_to(m)
 
-    except Exception as e:
-        logger.error(f"Error in adding charging station markers: {str(e)}")
+                    # Draw a radius around the selected fitness studio
+                    folium.Circle(
+                        location=[sel_lat, sel_lon],
+                        radius=search_radius_km * 1000,  # Convert km to meters
+                        color="blue",
+                        weight=2,
+                        fill=True,
+                        fill_color="blue",
+                        fill_opacity=0.2,
+                        tooltip=f"Suchradius: {search_radius_km} km"
+                    ).add_to(m)
+
+                    # Add charging station markers
+                    logger.info(f"Attempting to add {len(_charging_stations)} charging stations to map")
+                    
+                    if _charging_stations:
+                        add_charging_station_markers(m, _charging_stations)
+                    else:
+                        logger.warning("No charging stations available to add to map")
+                        
+            except (ValueError, TypeError) as e:
+                logger.error(f"Invalid coordinates for selected fitness: {e}")
+                st.error("Fehler bei den Koordinaten des ausgewählten Studios")
+
+    # Drop whitespace between tags to shrink the iframe payload; <script> bodies are kept
+    # as they are, since the pattern could also match JS code or string literals
+    parts = SCRIPT_BLOCK_PATTERN.split(m.get_root().render())
+    return "".join(
+        part if part.lower().startswith("<script") else re.sub(r">\s+<", "><", part)
+        for part in parts
+    )
+
+
+def get_active_studios() -> List[str]:
+    """
+    Studio names of the current search whose checkbox is checked.
+
+    Returns:
+        Checked studio names in the order of st.session_state.studios_name
+    """
+    studio_filters = st.session_state.studio_filters
+    return [studio for studio in st.session_state.studios_name if studio_filters.get(studio, True)]
+
+
+def get_map_layers_key() -> Tuple:
+    """
+    Summarize the session state that shapes the map layers as a hashable tuple.
+
+    Returns:
+        (search parameters, selected studio id, active studio names,
+         charging station coordinates, has town boundary)
+    """
+    # The fitness centers on the map are fully determined by the last search
+    search_key = tuple(sorted(st.session_state.last_search_params.items()))
+
+    selected = st.session_state.selected_fitness
+    selected_key = selected.get("id") if selected else None
+
+    active_studios = tuple(sorted(get_active_studios()))
+    # The station list depends on the session (radius history, fallback, API errors), so
+    # key on its content; the HTML cache is shared by all sessions
+    station_keys = tuple(
+        (round(station["latitude"], 5), round(station["longitude"], 5))
+        for station in st.session_state.get("charging_stations", [])
+    )
+    return (
+        search_key,
+        selected_key,
+        active_studios,
+        station_keys,
+        bool(st.session_state.get("town_boundary")),
+    )
+
+
+def validate_charging_stations(stations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Drop charging stations without usable coordinates and convert them to floats.
+
+    Args:
+        stations: Charging stations as returned by get_charging_stations
+
+    Returns:
+        Stations with numeric, non-zero latitude/longitude
+    """
+    if not stations:
+        return []
+
+    df = pd.DataFrame(stations)
+    # "Unknown" and None become NaN and are dropped together with zero coordinates
+    df["latitude"] = pd.to_numeric(df["latitude"], errors="coerce")
+    df["longitude"] = pd.to_numeric(df["longitude"], errors="coerce")
+    df = df.dropna(subset=["latitude", "longitude"])
+    df = df[(df["latitude"] != 0) & (df["longitude"] != 0)]
+    return df.to_dict("records")
+
+
+def filter_stations_by_radius(
+    stations: List[Dict[str, Any]], lat: float, lon: float, radius_km: float
+) -> List[Dict[str, Any]]:
+    """
+    Keep the charging stations within a radius of a point.
+
+    Args:
+        stations: Validated charging stations with float coordinates
+        lat: Latitude of the center point
+        lon: Longitude of the center point
+        radius_km: Radius in kilometers
+
+    Returns:
+        Stations within the radius, in their original order
+    """
+    if not stations:
+        return []
+
+    distances = haversine_km(
+        lat, lon,
+        [station["latitude"] for station in stations],
+        [station["longitude"] for station in stations],
+    )
+    return [station for station, distance in zip(stations, distances) if distance <= radius_km]
 
 
 # Enhanced UI Handler functions
 def handle_fitness_selection(fitness: Dict[str, Any]) -> None:
     """
     Handle when a fitness center is selected with improved error handling and debugging.
+
+    Used as the on_click callback of the sidebar cards, so the following script
+    run already renders the new selection without an explicit st.rerun().
     """
     try:
         logger.info(f"Selecting fitness studio: {fitness.get('name', 'Unknown')}")
@@ -252,86 +594,94 @@ def handle_fitness_selection(fitness: Dict[str, Any]) -> None:
             # Fetch nearby charging stations using radius from sidebar
             radius_km = st.session_state.get("search_radius_km", DEFAULT_SEARCH_RADIUS_KM)
             
-            logger.info(f"Fetching charging stations with radius: {radius_km}km")
+            # Same studio re-selected: its stations are already loaded
+            charging_key = (lat, lon)
+            if st.session_state.last_charging_key == charging_key:
+                logger.info("Charging stations already loaded for this studio")
+                return
+            
+            logger.info(f"Fetching charging stations with radius: {MAX_SEARCH_RADIUS_KM}km")
             
             # Show loading message
             with st.spinner(f"Lade Ladestationen im Umkreis von {radius_km}km..."):
                 try:
+                    # Fetch once at the largest slider radius; smaller radii are filtered in memory
+                    # Coordinates rounded to ~1 m so near-identical studios share a cache entry
                     charging_stations = get_charging_stations(
-                        latitude=lat,
-                        longitude=lon,
-                        max_results=50,
-                        radius_km=radius_km
+                        latitude=round(lat, 5),
+                        longitude=round(lon, 5),
+                        max_results=MAX_CHARGING_STATIONS,
+                        radius_km=MAX_SEARCH_RADIUS_KM
                     )
+                    if len(charging_stations) >= MAX_CHARGING_STATIONS:
+                        logger.warning(
+                            f"Charging station request hit the limit of {MAX_CHARGING_STATIONS} results; "
+                            "stations near the studio may be missing"
+                        )
                     
-                    # Validate charging station data
-                    valid_stations = []
-                    for station in charging_stations:
-                        try:
-                            if (station.get("latitude") != "Unknown" and 
-                                station.get("longitude") != "Unknown" and
-                                station.get("latitude") is not None and 
-                                station.get("longitude") is not None):
-                                
-                                # Convert to float to ensure they're numeric
-                                station["latitude"] = float(station["latitude"])
-                                station["longitude"] = float(station["longitude"])
-                                valid_stations.append(station)
-                        except (ValueError, TypeError):
-                            continue
+                    valid_stations = validate_charging_stations(charging_stations)
                     
-                    st.session_state.charging_stations = valid_stations
-                    logger.info(f"Found {len(valid_stations)} valid charging stations")
+                    st.session_state.charging_stations_all = valid_stations
+                    st.session_state.last_charging_key = charging_key
+                    nearby_stations = filter_stations_by_radius(valid_stations, lat, lon, radius_km)
+                    st.session_state.charging_stations = nearby_stations
+                    logger.info(f"Found {len(nearby_stations)} valid charging stations")
                     
                     # Show success message
-                    if valid_stations:
-                        st.success(f"✅ {len(valid_stations)} Ladestationen gefunden!")
+                    if nearby_stations:
+                        st.success(f"✅ {len(nearby_stations)} Ladestationen gefunden!")
                     else:
                         st.warning(f"⚠️ Keine Ladestationen im Umkreis von {radius_km}km gefunden.")
                         
                         # Try with larger radius as fallback
-                        if radius_km < 5:
-                            logger.info(f"Trying with larger radius: {radius_km + 2}km")
-                            fallback_stations = get_charging_stations(
-                                latitude=lat,
-                                longitude=lon,
-                                max_results=50,
-                                radius_km=radius_km + 2
-                            )
-                            
-                            # Validate fallback stations
-                            valid_fallback = []
-                            for station in fallback_stations:
-                                try:
-                                    if (station.get("latitude") != "Unknown" and 
-                                        station.get("longitude") != "Unknown"):
-                                        station["latitude"] = float(station["latitude"])
-                                        station["longitude"] = float(station["longitude"])
-                                        valid_fallback.append(station)
-                                except (ValueError, TypeError):
-                                    continue
+                        if radius_km < MAX_SEARCH_RADIUS_KM:
+                            fallback_radius = min(radius_km + 2, MAX_SEARCH_RADIUS_KM)
+                            logger.info(f"Trying with larger radius: {fallback_radius}km")
+                            valid_fallback = filter_stations_by_radius(valid_stations, lat, lon, fallback_radius)
                             
                             if valid_fallback:
                                 st.session_state.charging_stations = valid_fallback
-                                st.info(f"🔍 {len(valid_fallback)} Ladestationen in {radius_km + 2}km Umkreis gefunden.")
+                                st.info(f"🔍 {len(valid_fallback)} Ladestationen in {fallback_radius}km Umkreis gefunden.")
                             
                 except Exception as e:
                     logger.error(f"Error fetching charging stations: {str(e)}")
                     st.session_state.charging_stations = []
+                    st.session_state.charging_stations_all = []
+                    st.session_state.last_charging_key = None
                     st.error(f"Fehler beim Laden der Ladestationen: {str(e)}")
             
         else:
             logger.error("No valid coordinates found in fitness data")
             st.error("Keine gültigen Koordinaten für das ausgewählte Studio gefunden.")
             
-        # Force app rerun to update the map
-        st.rerun()
-            
     except Exception as e:
         logger.error(f"Error in fitness selection handler: {str(e)}")
         st.error("Es ist ein Fehler bei der Auswahl des Studios aufgetreten.")
 
 
+def handle_radius_change() -> None:
+    """
+    Slider callback: store the new radius and re-filter the charging stations of the selected studio.
+
+    Runs before the script reruns, so the updated stations are picked up by
+    that same run and no extra st.rerun() is needed.
+    """
+    search_radius_km = st.session_state.radius_slider
+    st.session_state.search_radius_km = search_radius_km
+
+    # Re-filter the already loaded stations of the selected studio; no API request needed
+    if st.session_state.selected_fitness and "latitude" in st.session_state.selected_fitness:
+        fitness = st.session_state.selected_fitness
+        try:
+            lat = float(fitness["latitude"])
+            lon = float(fitness["longitude"])
+            st.session_state.charging_stations = filter_stations_by_radius(
+                st.session_state.charging_stations_all, lat, lon, search_radius_km
+            )
+        except Exception as e:
+            logger.error(f"Error updating charging stations: {e}")
+
+
 # Enhanced address search handler
 def handle_address_search(address: str, country_code: str) -> None:
     """
@@ -360,8 +710,8 @@ def handle_address_search(address: str, country_code: str) -> None:
         
         st.session_state.location = address
 
-        # Geocode the address
-        coords = geocode_location(address)
+        # Geocode the address (coordinates and city in one cached lookup)
+        coords, extracted_city = geocode_location(address, country_code)
         if not coords:
             st.error(f"Konnte die Adresse '{address}' nicht finden.")
             return
@@ -370,9 +720,6 @@ def handle_address_search(address: str, country_code: str) -> None:
         st.session_state.map_center = coords
         st.session_state.zoom_start = 12  # Set zoom to 12 for search results
         
-        # Try to extract city name for town boundary
-        extracted_city = extract_city_from_address(address)
-        
         # Get town boundary if we can extract a city
         if extracted_city:
             st.session_state.town_boundary = get_town_boundary(extracted_city, country_code)
@@ -380,12 +727,27 @@ def handle_address_search(address: str, country_code: str) -> None:
             st.session_state.town_boundary = None
         
         # Get fitness centers within reasonable distance (e.g., 50km)
-        nearby_centers = get_fitness_centers_by_coordinates(coords, country_code, max_distance_km=50)
+        nearby_centers = get_fitness_centers_by_coordinates(
+            coords, country_code, max_distance_km=50, search_index=load_fitness_search_index()
+        )
         
         if not nearby_centers.empty:
+            # Stable row id per search result, used to recognize the selected studio
+            nearby_centers = nearby_centers.reset_index(drop=True)
+            nearby_centers["id"] = nearby_centers.index
+            
+            # Format the display address once instead of per card and rerun
+            nearby_centers["full_address"] = build_full_addresses(nearby_centers)
+            
             # Store the filtered fitness centers
             st.session_state.fitness_centers = nearby_centers
             
+            # Group the records by studio name once; the sidebar reads them on every rerun
+            st.session_state.records_by_name = {
+                name: group.to_dict("records")
+                for name, group in nearby_centers.groupby("name", sort=False)
+            }
+            
             # Extract studio names for filtering
             st.session_state.studios_name = get_studio_names_from_centers(nearby_centers)
             
@@ -403,12 +765,15 @@ def handle_address_search(address: str, country_code: str) -> None:
         else:
             st.warning(f"Keine Fitnessstudios in der Nähe von '{address}' gefunden.")
             st.session_state.fitness_centers = pd.DataFrame()
+            st.session_state.records_by_name = {}
             st.session_state.studios_name = []
             st.session_state.search_results_info = None
         
         # Reset selections
         st.session_state.selected_fitness = None
         st.session_state.charging_stations = []
+        st.session_state.charging_stations_all = []
+        st.session_state.last_charging_key = None
         st.session_state.selected_studios = []
         
         # Save this search as the last one performed
@@ -436,19 +801,14 @@ def show_compact_fitness_card(fitness_data, card_index):
         # Title with distance
         st.markdown(f"**🏋️‍♂️ {name}{distance_text}**")
         
-        # Create more reliable unique key
+        # card_index is unique within a run and stable across reruns
         lat = fitness_data.get('latitude', 0)
         lon = fitness_data.get('longitude', 0)
-        name_hash = hash(name) % 10000  # Simple hash of name
-        unique_key = f"btn_{card_index}_{name_hash}_{str(lat).replace('.', '_')}_{str(lon).replace('.', '_')}"
+        unique_key = f"btn_{card_index}"
         
         # Show current selection status
-        is_selected = False
-        if st.session_state.selected_fitness:
-            selected_lat = st.session_state.selected_fitness.get('latitude')
-            selected_lon = st.session_state.selected_fitness.get('longitude')
-            is_selected = (abs(float(selected_lat or 0) - float(lat or 0)) < 0.0001 and 
-                          abs(float(selected_lon or 0) - float(lon or 0)) < 0.0001)
+        selected = st.session_state.selected_fitness
+        is_selected = selected is not None and selected.get("id") == fitness_data.get("id")
         
         button_text = "✅ Ausgewählt" if is_selected else "🗺️ Auf Karte anzeigen"
         button_type = "secondary" if is_selected else "primary"
@@ -458,26 +818,17 @@ def show_compact_fitness_card(fitness_data, card_index):
             st.caption(f"Key: {unique_key}")
             st.caption(f"Coords: {lat}, {lon}")
         
-        if st.button(
+        # Selection runs as a callback, before the rerun renders the sidebar and map;
+        # handle_fitness_selection validates the coordinates
+        st.button(
             button_text,
             key=unique_key,
             help="Studio auswählen und Ladestationen anzeigen",
             use_container_width=True,
-            type=button_type
-        ):
-            if not is_selected:  # Only select if not already selected
-                logger.info(f"Button clicked for studio: {name} at {lat}, {lon}")
-                
-                # Validate coordinates before selection
-                try:
-                    test_lat = float(lat)
-                    test_lon = float(lon)
-                    if test_lat != 0 and test_lon != 0:
-                        handle_fitness_selection(fitness_data)
-                    else:
-                        st.error("Ungültige Koordinaten für dieses Studio.")
-                except (ValueError, TypeError):
-                    st.error("Fehler beim Verarbeiten der Studio-Koordinaten.")
+            type=button_type,
+            on_click=None if is_selected else handle_fitness_selection,  # Only select if not already selected
+            args=(fitness_data,),
+        )
 
 
 # Enhanced fitness studios display for sidebar
@@ -499,14 +850,8 @@ def show_fitness_studios_in_sidebar():
                 if "distance_km" in selected and pd.notna(selected["distance_km"]):
                     distance_text = f" ({selected['distance_km']:.1f}km)"
                 
-                # Create address for selected studio
-                address_parts = [
-                    str(selected.get("addr:street", "")) if pd.notna(selected.get("addr:street")) else "",
-                    str(selected.get("addr:housenumber", "")) if pd.notna(selected.get("addr:housenumber")) else "",
-                    str(selected.get("addr:city", "")) if pd.notna(selected.get("addr:city")) else ""
-                ]
-                address_parts = [part for part in address_parts if part and part.lower() != "nan"]
-                address = " ".join(address_parts)
+                # Address for selected studio (precomputed in handle_address_search)
+                address = selected.get("full_address", "")
                 
                 # Add selected studio info to the message
                 selected_info = f" | ⭐ {name}{distance_text}"
@@ -522,21 +867,17 @@ def show_fitness_studios_in_sidebar():
         # Scrollable container for fitness studios
         with st.container(height=400):
             card_index = 0  # Simple counter for unique keys
-            for studio in st.session_state.studios_name:
-                # Check if this studio is currently filtered in (checkbox is checked)
-                if studio in st.session_state.studio_filters and st.session_state.studio_filters[studio]:
-                    fitness_centers = get_fitness_centers_by_name_from_df(studio, st.session_state.fitness_centers)
-                    if not fitness_centers.empty:
-                        for _, fitness_row in fitness_centers.iterrows():
-                            # Convert DataFrame row to dictionary
-                            fitness_dict = fitness_row.to_dict()
-                            
-                            # Create compact card for sidebar with unique index
-                            show_compact_fitness_card(fitness_dict, card_index)
-                            card_index += 1  # Increment for next card
-                            displayed_studios = True
-                    else:
-                        st.text(f"🧰 Keine Ergebnisse für {studio}")
+            # Only studios whose checkbox is checked
+            for studio in get_active_studios():
+                records = st.session_state.records_by_name.get(studio, [])
+                if records:
+                    for fitness_dict in records:
+                        # Create compact card for sidebar with unique index
+                        show_compact_fitness_card(fitness_dict, card_index)
+                        card_index += 1  # Increment for next card
+                        displayed_studios = True
+                else:
+                    st.text(f"🧰 Keine Ergebnisse für {studio}")
         
         if not displayed_studios:
             st.info("🧰 Wählen Sie mindestens ein Studio aus.")
@@ -560,16 +901,8 @@ def show_selected_studio_details():
     
     st.markdown(f"**🏋️‍♂️ {name}{distance_text}**")
     
-    # Address information - convert all to strings to avoid float join error
-    address_parts = [
-        str(fitness_data.get("addr:street", "")) if pd.notna(fitness_data.get("addr:street")) else "",
-        str(fitness_data.get("addr:housenumber", "")) if pd.notna(fitness_data.get("addr:housenumber")) else "",
-        str(fitness_data.get("addr:postcode", "")) if pd.notna(fitness_data.get("addr:postcode")) else "",
-        str(fitness_data.get("addr:city", "")) if pd.notna(fitness_data.get("addr:city")) else "",
-    ]
-    # Filter out empty strings and "nan" strings
-    address_parts = [part for part in address_parts if part and part.lower() != "nan"]
-    full_address = " ".join(address_parts)
+    # Address information (precomputed in handle_address_search)
+    full_address = fitness_data.get("full_address", "")
     
     if full_address:
         st.markdown(f"📍 **Adresse:**  \n{full_address}")
@@ -595,13 +928,23 @@ def show_selected_studio_details():
     # Action buttons
     col1, col2 = st.columns(2)
     with col1:
-        # Add nanoseconds for unique key
-        nano_time1 = time.time_ns()
-        if st.button("Auf Karte zentrieren", use_container_width=True, key=f"center_btn_{nano_time1}"):
-            # Re-center map on selected studio
-            st.session_state.map_center = [float(fitness_data["latitude"]), float(fitness_data["longitude"])]
-            st.session_state.zoom_start = 15
-            st.rerun()
+        st.button(
+            "Auf Karte zentrieren",
+            use_container_width=True,
+            key="center_selected_btn",
+            on_click=center_map_on_selected,
+        )
+
+
+def center_map_on_selected() -> None:
+    """Button callback: re-center the map on the selected studio."""
+    fitness_data = st.session_state.selected_fitness
+    if fitness_data:
+        st.session_state.map_center = [float(fitness_data["latitude"]), float(fitness_data["longitude"])]
+        st.session_state.zoom_start = 15
+        # Panning happens only in the browser, so center and zoom may be unchanged;
+        # the nonce makes the HTML differ so the component reloads the map anyway
+        st.session_state.recenter_count += 1
 
 
 # Main application
@@ -636,42 +979,16 @@ def main():
         )
         st.session_state.selected_country_code = country_code
         
-        # Search radius slider
-        search_radius_km = st.slider(
+        # Search radius slider (charging stations are reloaded in the on_change callback)
+        st.slider(
             "🔄 Suchradius für Ladestationen (km):", 
             min_value=1, 
-            max_value=5,
+            max_value=MAX_SEARCH_RADIUS_KM,
             value=st.session_state.get("search_radius_km", DEFAULT_SEARCH_RADIUS_KM),
+            key="radius_slider",
+            on_change=handle_radius_change,
             help="Entfernung für die Suche nach Ladestationen um das ausgewählte Fitnessstudio"
         )
-        
-        # Update session state and refresh charging stations if needed
-        if search_radius_km != st.session_state.get("search_radius_km", DEFAULT_SEARCH_RADIUS_KM):
-            st.session_state.search_radius_km = search_radius_km
-            # Auto-update charging stations if fitness center is selected
-            if st.session_state.selected_fitness and "latitude" in st.session_state.selected_fitness:
-                fitness = st.session_state.selected_fitness
-                try:
-                    lat = float(fitness["latitude"])
-                    lon = float(fitness["longitude"])
-                    charging_stations = get_charging_stations(lat, lon, radius_km=search_radius_km)
-                    
-                    # Validate stations
-                    valid_stations = []
-                    for station in charging_stations:
-                        try:
-                            if (station.get("latitude") != "Unknown" and 
-                                station.get("longitude") != "Unknown"):
-                                station["latitude"] = float(station["latitude"])
-                                station["longitude"] = float(station["longitude"])
-                                valid_stations.append(station)
-                        except (ValueError, TypeError):
-                            continue
-                    
-                    st.session_state.charging_stations = valid_stations
-                    st.rerun()
-                except Exception as e:
-                    logger.error(f"Error updating charging stations: {e}")
     
     # Studio filter section
     if not st.session_state.fitness_centers.empty:
@@ -684,7 +1001,12 @@ def main():
             new_state = not all_selected  # Toggle
             for studio in st.session_state.studios_name:
                 st.session_state.studio_filters[studio] = new_state
-                st.session_state[f"studio_{studio}"] = new_state
+
+        # Function to apply the multiselect to the filters
+        def update_studio_filters():
+            selected_studios = set(st.session_state.studio_multiselect)
+            for studio in st.session_state.studios_name:
+                st.session_state.studio_filters[studio] = studio in selected_studios
 
         # Sidebar dropdown menu (expander) for studios
         with st.sidebar.expander("Ausgewählte Fitnessstudiokette", expanded=False):
@@ -692,18 +1014,20 @@ def main():
             toggle_label = "✅ Alle auswählen" if not all_selected else "🚫 Alle abwählen"
             st.button(toggle_label, on_click=toggle_all_studios, use_container_width=True)
 
-            # Scrollable checkbox list inside the expander
-            with st.container(height=200):
-                if st.session_state.studios_name:
-                    for studio in st.session_state.studios_name:
-                        checkbox_value = st.checkbox(
-                            studio,
-                            key=f"studio_{studio}",
-                            value=st.session_state.studio_filters.get(studio, True),
-                        )
-                        st.session_state.studio_filters[studio] = checkbox_value
-                else:
-                    st.text("🧰 Keine Studios verfügbar")
+            # One multiselect for all studios; studio_filters stays the source of truth,
+            # so the widget is synced with it before it is drawn (new search, toggle button)
+            if st.session_state.studios_name:
+                st.session_state.studio_multiselect = get_active_studios()
+                st.multiselect(
+                    "Fitnessstudioketten",
+                    options=st.session_state.studios_name,
+                    key="studio_multiselect",
+                    on_change=update_studio_filters,
+                    label_visibility="collapsed",
+                    placeholder="Studios auswählen",
+                )
+            else:
+                st.text("🧰 Keine Studios verfügbar")
         
         # Results section in sidebar
         with st.sidebar.expander("🎯 Ergebnisse", expanded=True):
@@ -733,10 +1057,14 @@ def main():
         if st.session_state.search_history:
             with st.expander("📋 Letzte Suchen"):
                 for search in reversed(st.session_state.search_history[-5:]):  # Show last 5 searches
-                    if st.button(f"🔄 {search}", key=f"recent_{search}"):
-                        address_input = search
-                        # Trigger search immediately
-                        handle_address_search(search, country_code)
+                    # Search runs as a callback, before the rerun renders sidebar and map;
+                    # coordinates and city come from the geocoding cache (same country only)
+                    st.button(
+                        f"🔄 {search}",
+                        key=f"recent_{search}",
+                        on_click=handle_address_search,
+                        args=(search, country_code),
+                    )
 
     with col2:
         search_button = st.button("🔍 Suchen", type="primary")
@@ -778,182 +1106,44 @@ def main():
     # Map header with legend on same line (smaller size)
     st.markdown("**Karte | Legende:** 🟣 Suchort | 🟢 Fitnessstudio | 🔴 Ausgewählt | 🔵 Ladestation")
     
-    # Debug info and charging station count
-    debug_info = []
-    if st.session_state.get("selected_fitness"):
-        selected = st.session_state.selected_fitness
-        debug_info.append(f"Ausgewähltes Studio: {selected.get('name')}")
-        debug_info.append(f"Koordinaten: {st.session_state.map_center}")
-        debug_info.append(f"Zoom: {st.session_state.zoom_start}")
-        
-        # Show charging station count
-        charging_count = len(st.session_state.get("charging_stations", []))
-        radius = st.session_state.get("search_radius_km", DEFAULT_SEARCH_RADIUS_KM)
-        debug_info.append(f"Ladestationen: {charging_count} (Radius: {radius}km)")
-        
-
-    
-    # Show warning if no charging stations found
-    if (st.session_state.get("selected_fitness") and 
-        len(st.session_state.get("charging_stations", [])) == 0):
-        st.warning(f"⚠️ Keine Ladestationen im Umkreis von {st.session_state.get('search_radius_km', DEFAULT_SEARCH_RADIUS_KM)}km gefunden. Versuchen Sie einen größeren Radius.")
+    selected = st.session_state.selected_fitness
+    charging_stations = st.session_state.get("charging_stations", [])
+    search_radius_km = st.session_state.get("search_radius_km", DEFAULT_SEARCH_RADIUS_KM)
 
     # Create map with proper center and zoom
     map_center = st.session_state.map_center
     zoom_level = st.session_state.zoom_start
     
-    # Debug info (optional - can be removed in production)
-    if st.session_state.get("selected_fitness"):
-        selected = st.session_state.selected_fitness
-        logger.info(f"Creating map centered on selected studio: {selected.get('name')} at {map_center} with zoom {zoom_level}")
+    if selected:
+        # Show warning if no charging stations found
+        if not charging_stations:
+            st.warning(f"⚠️ Keine Ladestationen im Umkreis von {search_radius_km}km gefunden. Versuchen Sie einen größeren Radius.")
+        logger.info(f"Creating map centered on selected studio: {selected.get('name')} at {map_center} with zoom {zoom_level} and {len(charging_stations)} charging stations")
     
-    m = create_base_map(center=map_center, zoom=zoom_level)
-
-    # Add country boundary visualization
-    country_name_map = {"DE": "Germany", "FR": "France"}
-    country_name = country_name_map[country_code]
-    try:
-        country_boundary = get_country_boundary(country_code)
-
-        if country_boundary:
-            # Add country boundary
-            folium.GeoJson(
-                country_boundary,
-                name="Country Boundary",
-                style_function=lambda feature: {
-                    "fillColor": "#A0C8F0",
-                    "color": "#0050A0",
-                    "weight": 2,
-                    "fillOpacity": 0.2,
-                }
-            ).add_to(m)
-
-            # Fit to bounds if available and no specific search location
-            try:
-                if not st.session_state.get("selected_fitness") and not st.session_state.location:
-                    bounds = folium.GeoJson(country_boundary).get_bounds()
-                    m.fit_bounds(bounds)
-            except Exception as e:
-                logger.warning(f"Could not fit to bounds: {e}")
-        else:
-            st.warning(f"⚠️ Grenze für {country_name} konnte nicht geladen werden.")
-    except Exception as e:
-        logger.warning(f"Error loading country boundary: {e}")
-    
-    # Add town boundary if available
-    if st.session_state.get("town_boundary"):
-        folium.GeoJson(
-            st.session_state.town_boundary,
-            name="Selected Town",
-            style_function=lambda feature: {
-                "fillColor": "orange",
-                "color": "orange",
-                "weight": 2,
-                "fillOpacity": 0.1,
-            },
-        ).add_to(m)
-    
-    # Add search location marker
-    if st.session_state.location and st.session_state.map_center:
-        folium.Marker(
-            location=st.session_state.map_center,
-            tooltip=f"🔍 Suchstandort: {st.session_state.location}",
-            icon=folium.Icon(color="purple", icon="search"),
-        ).add_to(m)
-    
-    # Add filtered fitness markers to the map
-    if st.session_state.studios_name and not st.session_state.fitness_centers.empty:
-        fitness_count = 0
-        for studio in st.session_state.studios_name:
-            # Only add markers for checked studios
-            if st.session_state.studio_filters.get(studio, True):
-                fitness_centers = get_fitness_centers_by_name_from_df(studio, st.session_state.fitness_centers)
-                if not fitness_centers.empty:
-                    for _, fitness_row in fitness_centers.iterrows():
-                        fitness_dict = fitness_row.to_dict()
-                        if "latitude" in fitness_dict and "longitude" in fitness_dict:
-                            try:
-                                lat = float(fitness_dict["latitude"])
-                                lon = float(fitness_dict["longitude"])
-                                
-                                if lat != 0 and lon != 0:
-                                    distance_text = ""
-                                    if "distance_km" in fitness_dict and pd.notna(fitness_dict["distance_km"]):
-                                        distance_text = f" ({fitness_dict['distance_km']:.1f}km)"
-                                    
-                                    folium.Marker(
-                                        location=[lat, lon],
-                                        tooltip=(f"🏋️‍♂️ {fitness_dict.get('name', 'Fitness Center')}{distance_text}"
-                                                f"<br>📍 {fitness_dict.get('addr:street', '')} {fitness_dict.get('addr:housenumber', '')}"
-                                                ),
-                                        icon=folium.Icon(**ICONS["fitness"]),
-                                    ).add_to(m)
-                                    fitness_count += 1
-                            except (ValueError, TypeError) as e:
-                                logger.error(f"Invalid coordinates for fitness center: {e}")
-        
-        logger.info(f"Added {fitness_count} fitness center markers to map")
-    
-    # Add selected fitness and charging stations if applicable
-    if st.session_state.selected_fitness:
-        selected = st.session_state.selected_fitness
-        
-        if "latitude" in selected and "longitude" in selected:
-            try:
-                sel_lat = float(selected["latitude"])
-                sel_lon = float(selected["longitude"])
-                
-                if sel_lat != 0 and sel_lon != 0:
-                    # Add special marker for selected fitness
-                    distance_text = ""
-                    if "distance_km" in selected and pd.notna(selected["distance_km"]):
-                        distance_text = f" ({selected['distance_km']:.1f}km)"
-                    
-                    folium.Marker(
-                        location=[sel_lat, sel_lon],
-                        tooltip=(f"⭐🏋️‍♂️ {selected.get('name', 'Selected Fitness')}{distance_text}"
-                                f"<br>📍 {selected.get('addr:street', '')} {selected.get('addr:housenumber', '')}"
-                                ),
-                        icon=folium.Icon(**ICONS["selected_fitness"]),
-                    ).add_to(m)
-
-                    # Draw a radius around the selected fitness studio
-                    current_search_radius = st.session_state.get("search_radius_km", DEFAULT_SEARCH_RADIUS_KM)
-                    folium.Circle(
-                        location=[sel_lat, sel_lon],
-                        radius=current_search_radius * 1000,  # Convert km to meters
-                        color="blue",
-                        weight=2,
-                        fill=True,
-                        fill_color="blue",
-                        fill_opacity=0.2,
-                        tooltip=f"Suchradius: {current_search_radius} km"
-                    ).add_to(m)
-
-                    # Add charging station markers
-                    charging_stations = st.session_state.get("charging_stations", [])
-                    logger.info(f"Attempting to add {len(charging_stations)} charging stations to map")
-                    
-                    if charging_stations:
-                        add_charging_station_markers(m, charging_stations)
-                        # Show success message after adding markers
-                        if st.session_state.get("debug_mode"):
-                            st.success(f"🔌 {len(charging_stations)} Ladestationen auf der Karte angezeigt")
-                    else:
-                        logger.warning("No charging stations available to add to map")
-                        
-            except (ValueError, TypeError) as e:
-                logger.error(f"Invalid coordinates for selected fitness: {e}")
-                st.error("Fehler bei den Koordinaten des ausgewählten Studios")
+    layers_key = get_map_layers_key()
+    map_html = build_map_html(
+        country_code,
+        tuple(map_center),
+        zoom_level,
+        st.session_state.location,
+        search_radius_km,
+        layers_key,
+        st.session_state.fitness_centers,
+        st.session_state.studios_name,
+        st.session_state.studio_filters,
+        selected,
+        charging_stations,
+        st.session_state.get("town_boundary"),
+    )
 
-    # Render the full-width map
-    st_folium(m, width=None, height=700, use_container_width=True)
+    if st.session_state.get("debug_mode") and charging_stations:
+        st.success(f"🔌 {len(charging_stations)} Ladestationen auf der Karte angezeigt")
 
+    # Render the full-width map (the re-center nonce stays outside the cached HTML)
+    if st.session_state.recenter_count:
+        map_html += f"\n<!-- recenter {st.session_state.recenter_count} -->"
+    components.html(map_html, height=700)
 
-# Check if UI needs to be refreshed
-if st.session_state.get("refresh_ui", False):
-    st.session_state.refresh_ui = False  # Reset flag
-    st.rerun()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file